@@ -27,7 +27,7 @@ Usage
 import time, subprocess, requests, json, fnmatch
 from pathlib import PurePath
 from datetime import datetime, timedelta, timezone
-from utils import get_serial_number, get_selected_device, adb
+from utils import get_serial_number, get_selected_device, adb, json_loads
 
 # ---------- Config ----------
 DEVICE = get_selected_device()
@@ -94,14 +94,20 @@ def reboot_and_wait(serial: str) -> datetime:
           If boot completion is not detected within timeout."""
     print("Rebooting device via ADB…")
     trigger_time = datetime.now(IST)
-    adb(serial, ["reboot"], check=False)
+    try:
+        adb(serial, ["reboot"], check=False)
+    except subprocess.TimeoutExpired:
+        pass  # over TCP `adb reboot` often hangs while the transport drops; the waits below decide
     print("Waiting for device (adb wait-for-device)…")
     subprocess.run(["adb", "-s", serial, "wait-for-device"], check=True, text=True, timeout=360)
     print("ADB device is online.")
     print("Waiting for sys.boot_completed=1")
     deadline = time.time() + 360
     while time.time() < deadline:
-        out = adb(serial, ["shell", "getprop", "sys.boot_completed"], check=False)
+        try:
+            out = adb(serial, ["shell", "getprop", "sys.boot_completed"], check=False)
+        except subprocess.TimeoutExpired:
+            continue  # adbd still coming up; the boot deadline bounds the loop
         if (out.stdout or "").strip() == "1":
             print("Boot completed.")
             return trigger_time
@@ -138,7 +144,7 @@ def fetch_page(headers: dict, from_iso: str, to_iso: str, offset: int) -> list:
     }
     response = requests.get(url, headers=headers, params=params, timeout=30)
     response.raise_for_status()
-    data = response.json()
+    data = json_loads(response.content)  # event pages are the largest payloads we parse
     if not isinstance(data, list):
         raise RuntimeError(f"Unexpected response: {type(data)} -> {data}")
     return data
@@ -234,6 +240,38 @@ def is_connected_display(events: dict) -> bool:
     return any(search_event in field.lower() for field in search_fields)
 
 
+def poll_for_event(headers: dict, from_iso: str, to_iso: str, predicate, label: str) -> dict | None:
+    """
+    Polls the event window every POLL_INTERVAL_MIN until `predicate` matches or POLL_TIMEOUT_MIN elapses.
+    Parameters:
+    headers : dict
+        HTTP headers.
+    from_iso, to_iso : str
+        Fixed event window in ISO format.
+    predicate : callable
+        Event matcher such as `is_bort_diskstats` or `is_connected_display`.
+    label : str
+        Event name used in progress messages.
+    Returns:
+    dict | None
+        The first matching event log entry, or None on timeout.
+    """
+    deadline = time.monotonic() + POLL_TIMEOUT_MIN * 60
+    last_count = 0
+    while time.monotonic() < deadline:
+        page = scan_window(headers, from_iso, to_iso)
+        last_count = len(page)
+        match = next((item for item in page if predicate(item)), None)
+        if match is not None:
+            ts = ts_ms_to_ist(match.get("timestamp")) if "timestamp" in match else "n/a"
+            print(f"{label} found at {ts}")
+            return match
+        print(f"…no match yet (scanned {last_count}). Sleeping {POLL_INTERVAL_MIN} min")
+        time.sleep(max(0.0, min(POLL_INTERVAL_MIN * 60, deadline - time.monotonic())))
+    print(f"{label} not found (scanned last page count={last_count})")
+    return None
+
+
 def ts_ms_to_ist(ms: int) -> str:
     """
     Converts a timestamp in milliseconds to a formatted IST string.
@@ -32,11 +32,13 @@ Timezones:
 """
 
 from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Optional
-import time, subprocess, re, requests
-from utils import get_serial_number,get_selected_device, get_auth_and_cookie
+import os, time, re, random, threading, requests
+from utils import adb, get_serial_number,get_selected_device, get_auth_and_cookie
 
 # -----Configuration -----
 #DEVICE = get_selected_device()
@@ -45,6 +47,9 @@ DEVICE_ID =get_serial_number(DEVICE)
 API_BASE = "https://logi-analytics.vc.logitech.com/api"
 LIST_URL = f"{API_BASE}/bugreports/{DEVICE_ID}"
 PRESIGN_URL = f"{API_BASE}/bugreports/get-download-url"
+BUGREPORT_POLL_MINUTES = int(os.getenv("BUGREPORT_POLL_MINUTES", "20"))  # on-demand portal poll window
+POLL_BACKOFF_START_SEC = 2   # first on-demand re-probe; doubles up to poll_every_sec
+_SESSION = requests.Session()  # keep-alive: the poll loops re-hit the same host every few seconds
 
 # ------Paths -----
 ROOT = Path(__file__).resolve().parents[1]
@@ -55,25 +60,7 @@ DOWNLOAD_DIR = ROOT / "downloaded_bugreports"
 IST = timezone(timedelta(hours=5, minutes=30))
 UTC = timezone.utc
 ISOZ = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z$")
-
-
-def load(p: Path) -> str | None:
-    """
-    Reads a file and returns its content as a stripped string.
-    Parameters:
-    -----------
-    path : str
-        Path to the file.
-    Returns:
-    --------
-    str
-        File content without leading/trailing whitespace.
-    """
-    try:
-        file_content = p.read_text(encoding="utf-8").strip()
-        return file_content if file_content else None
-    except FileNotFoundError:
-        return None
+UNSAFE_FILENAME = re.compile(r'[:<>\"/\\|?*]+')  # characters not allowed in Windows filenames
 
 
 def headers(jwt, cookie):
@@ -179,7 +166,7 @@ def presign(header, path):
     str
         Presigned download URL.
     """
-    response = requests.post(PRESIGN_URL, headers=header, json={"path": path}, timeout=30)
+    response = _SESSION.post(PRESIGN_URL, headers=header, json={"path": path}, timeout=30)
     response.raise_for_status()
     response_json = response.json()
     return response_json.get("url") or response_json.get("signedUrl") or response_json.get("download_url")
@@ -202,7 +189,7 @@ def safe_stamp(dt):
     else:
         dt = dt.astimezone(timezone.utc)
     s = dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
-    return re.sub(r'[:<>\"/\\|?*]+', '-', s)
+    return UNSAFE_FILENAME.sub('-', s)
 
 
 def download_ondemand_bugreport(signed_url, found_time):
@@ -222,7 +209,7 @@ def download_ondemand_bugreport(signed_url, found_time):
         found_time = datetime.fromisoformat(found_time.replace("Z", "+00:00"))
     name = f"debugarchive_on-demand_{safe_stamp(found_time)}_{safe_stamp(datetime.now(timezone.utc))}.zip"
     output_path = DOWNLOAD_DIR / name
-    with requests.get(signed_url, stream=True, timeout=120) as response:
+    with _SESSION.get(signed_url, stream=True, timeout=120) as response:
         response.raise_for_status()
         with open(output_path, 'wb') as f:
             for chunk in response.iter_content(chunk_size=8192):
@@ -248,7 +235,7 @@ def download_periodic_bugreport(signed_url, found_time):
         found_time = datetime.fromisoformat(found_time.replace("Z", "+00:00"))
     name = f"debugarchive_periodic_{safe_stamp(found_time)}_{safe_stamp(datetime.now(timezone.utc))}.zip"
     output_path = DOWNLOAD_DIR / name
-    with requests.get(signed_url, stream=True, timeout=120) as response:
+    with _SESSION.get(signed_url, stream=True, timeout=120) as response:
         response.raise_for_status()
         with open(output_path, 'wb') as f:
             for chunk in response.iter_content(chunk_size=8192):
@@ -267,12 +254,12 @@ def trigger_on_demand(adb_id):
     datetime
         Trigger time in IST.
     """
-    subprocess.run(f"adb -s {adb_id} root", shell=True, check=False)
+    # utils.adb bounds both calls by ADB_TIMEOUT_SEC; a hung adbd raises TimeoutExpired
+    adb(adb_id, ["root"], check=False)
     trigger_time = datetime.now(IST)
-    cmd = ("adb -s {id} shell am broadcast "
-           "-a com.logitech.intent.action.GENERATE_BUG_REPORT "
-           "-n com.logitech.crashanalytics/com.memfault.bort.receivers.ControlReceiver").format(id=adb_id)
-    subprocess.run(cmd, shell=True, check=True)
+    adb(adb_id, ["shell", "am", "broadcast",
+                 "-a", "com.logitech.intent.action.GENERATE_BUG_REPORT",
+                 "-n", "com.logitech.crashanalytics/com.memfault.bort.receivers.ControlReceiver"])
     print("Triggered at (IST):", trigger_time.isoformat())
     return trigger_time
 
@@ -291,39 +278,45 @@ def to_aware_utc(dt_or_str):
     return dt.astimezone(UTC)
 
 
-def poll_and_download_ondemand(jwt, cookie, trigger_time, poll_minutes=15, poll_every_sec=60):
+def get_portal_metadata(jwt, cookie, trigger_time, poll_minutes=BUGREPORT_POLL_MINUTES, poll_every_sec=30) -> dict:
     """
-    Polls the bugreport API for ON-DEMAND DebugArchive reports and downloads the latest one.
+    Polls the bugreport API for the newest ON-DEMAND DebugArchive report WITHOUT downloading it.
+    Re-probes with exponential backoff (2s, 4s, 8s, ... capped at poll_every_sec) plus a little jitter,
+    so a report that is indexed quickly is picked up within seconds instead of a full interval.
     Parameters:
     -----------
     jwt : str
         Raw JWT token.
     cookie : str
         Full cookie string.
-    trigger_utc : datetime
+    trigger_time : datetime
         Time when the bugreport was triggered.
     poll_minutes : int
-        Total duration to poll (default: 15 minutes).
+        Total duration to poll (default: BUGREPORT_POLL_MINUTES, 20 minutes).
     poll_every_sec : int
-        Interval between polls (default: 60 seconds).
+        Upper bound on the delay between polls (default: 30 seconds).
     Returns:
-        None
+    --------
+    dict
+        {"path": <.mar path from metadata>, "report_path": <archive path>, "timestamp": <IST ISO>}.
+    Raises:
+    -------
+    TimeoutError
+        If no report shows up within the window; the message carries the number of probes made.
     """
     request_headers = headers(jwt, cookie)
     poll_start_time = trigger_time - timedelta(minutes=2)  # start a bit earlier to account for clock skew
     poll_end_time = trigger_time + timedelta(minutes=poll_minutes)  # poll window upto poll_minutes after trigger
+    # stop after poll window has fully elapsed (+1 min grace); monotonic so clock steps can't stretch it
+    remaining = (poll_end_time + timedelta(minutes=1) - datetime.now(IST)).total_seconds()
+    deadline = time.monotonic() + max(0.0, remaining)
+    delay = POLL_BACKOFF_START_SEC
     attempt = 0
     print("Polling for on-demand reports from", poll_start_time, "to", poll_end_time)
     while True:
         attempt += 1
-        now_utc = datetime.now(IST)
-        # stop after poll window has fully elapsed
-        if now_utc > poll_end_time + timedelta(minutes=1):
-            print("Timeout: on-demand report not visible in analytics within window.")
-            return
-
         params = {"from": iso_z(poll_start_time), "to": iso_z(poll_end_time)}
-        response = requests.get(LIST_URL, headers=request_headers, params=params, timeout=30)
+        response = _SESSION.get(LIST_URL, headers=request_headers, params=params, timeout=30)
         print(f"[{attempt}] GET {response.url} -> {response.status_code}")
         if response.status_code == 200:
             report_items = response.json() if isinstance(response.json(), list) else []
@@ -342,25 +335,54 @@ def poll_and_download_ondemand(jwt, cookie, trigger_time, poll_minutes=15, poll_
                 report_path = latest_report.get("path")
                 mar_path = (latest_report.get("metadata",{}) or {}).get("path") or ""
                 print("Found ON-DEMAND:", latest_timestamp, "path=", report_path)
-                url = presign(request_headers, report_path)
-                fname = download_ondemand_bugreport(url, datetime.fromisoformat(latest_timestamp.replace("Z", "+00:00")))
-                return {"path":mar_path, "saved_as": fname}
-        # not found yet
-        sleep_left = poll_every_sec
-        while sleep_left > 0:
-            time.sleep(1)
-            sleep_left -= 1
-        print()           # newline after progress
-
-
-def poll_and_download_periodic(jwt, cookie, from_time, to_time, poll_every_sec=60) -> str:
+                return {"path": mar_path, "report_path": report_path, "timestamp": latest_timestamp}
+        # not found yet: back off, never sleeping past the deadline
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError(
+                f"ON-DEMAND bugreport not visible in analytics within window after {attempt} probes.")
+        time.sleep(min(delay + random.uniform(0, delay * 0.1), left))
+        delay = min(delay * 2, poll_every_sec)
+
+
+def poll_and_download_ondemand(jwt, cookie, trigger_time, poll_minutes=BUGREPORT_POLL_MINUTES, poll_every_sec=30):
+    """
+    Polls the bugreport API for ON-DEMAND DebugArchive reports and downloads the latest one.
+    Parameters:
+    -----------
+    jwt : str
+        Raw JWT token.
+    cookie : str
+        Full cookie string.
+    trigger_utc : datetime
+        Time when the bugreport was triggered.
+    poll_minutes : int
+        Total duration to poll (default: BUGREPORT_POLL_MINUTES, 20 minutes).
+    poll_every_sec : int
+        Upper bound on the backoff between polls (default: 30 seconds).
+    Returns:
+        {"path": <.mar path>, "saved_as": <zip name>}.
+    Raises:
+        TimeoutError if nothing appeared in the window (see get_portal_metadata).
+    """
+    report = get_portal_metadata(jwt, cookie, trigger_time, poll_minutes, poll_every_sec)
+    url = presign(headers(jwt, cookie), report["report_path"])
+    fname = download_ondemand_bugreport(url, datetime.fromisoformat(report["timestamp"].replace("Z", "+00:00")))
+    return {"path": report["path"], "saved_as": fname}
+
+
+def poll_and_download_periodic(jwt, cookie, from_time, to_time, poll_every_sec=60,
+                               stop: threading.Event | None = None) -> str | None:
     """
     Poll for a periodic (NOT on-demand) DebugArchive in [from_time, to_time],
     download the newest, and return the saved ZIP path.
 
     Accepts `from_time`/`to_time` as aware datetimes or ISO strings (IST/UTC).
     Uses UTC internally. Raises TimeoutError if no match appears by the deadline.
+    `stop` lets a caller running this in the background cancel it: once set, the poll
+    returns None at the next check instead of downloading.
     """
+    stop = stop or threading.Event()
     request_headers = headers(jwt, cookie)
     # Normalize inputs to aware UTC
     start_dt = to_aware_utc(from_time)
@@ -377,7 +399,7 @@ def poll_and_download_periodic(jwt, cookie, from_time, to_time, poll_every_sec=6
             "from": iso_z(start_dt),
             "to":   iso_z(end_dt),
         }
-        response = requests.get(LIST_URL, headers=request_headers, params=params, timeout=30)
+        response = _SESSION.get(LIST_URL, headers=request_headers, params=params, timeout=30)
         print(f"[{attempt}] GET {response.url} -> {response.status_code}")
 
         if response.status_code in (401, 403):
@@ -396,6 +418,8 @@ def poll_and_download_periodic(jwt, cookie, from_time, to_time, poll_every_sec=6
             ts_str = ts_from_item(report)
             if ts_str:
                 matches.append((ts_str, report))
+        if stop.is_set():
+            break
         if matches:
             # newest first; ISO timestamps sort well lexicographically
             matches.sort(key=lambda x: x[0], reverse=True)
@@ -408,12 +432,36 @@ def poll_and_download_periodic(jwt, cookie, from_time, to_time, poll_every_sec=6
             saved_path = download_periodic_bugreport(url, ts_dt)
             print(f"Saved: {saved_path}")
             return saved_path  # return path so test can assert
-        for s in range(poll_every_sec, 0, -1):
-            time.sleep(1)
+        if stop.wait(poll_every_sec):
+            break
         print()
+    if stop.is_set():
+        print("Periodic poll cancelled.")
+        return None
     raise TimeoutError("Periodic bugreport did not appear within the poll window.")
 
 
+@contextmanager
+def periodic_download_in_background(jwt, cookie, from_time, to_time, poll_every_sec=60):
+    """
+    Run poll_and_download_periodic in a worker thread for the duration of the `with` block
+    and yield its Future (`.result()` is the saved ZIP path).
+    Leaving the block before it finished (e.g. a failed assertion) cancels the poll and
+    joins the thread: a late debugarchive_*.zip would otherwise be picked up by a later
+    test's extraction, and a live thread blocks interpreter exit.
+    """
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    future: Future = executor.submit(poll_and_download_periodic, jwt, cookie, from_time, to_time,
+                                     poll_every_sec=poll_every_sec, stop=stop)
+    try:
+        yield future
+    finally:
+        if not future.done():
+            stop.set()
+        executor.shutdown(wait=True)
+
+
 def main():
     """
      Main entry point:
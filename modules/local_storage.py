@@ -9,7 +9,8 @@ Flow
       - ip link set IFACE down
       - sleep 5
       - send CrashAnalytics GENERATE_BUG_REPORT broadcast
-      - poll cache every 3 minutes (5 tries = 15 minutes) for android-bugreport*.mar
+      - wait up to 15 minutes for android-bugreport*.mar (inotifywait when the DUT has it,
+        otherwise a short poll)
       - IF found => write status=found, path=..., bring IFACE up, exit 0
       - IF timeout => write status=timeout, bring IFACE up, exit non-zero
    All actions log to /data/local/tmp/ca_chain.log and a short result to
@@ -36,6 +37,10 @@ MAR_GLOB = "android-bugreport*.mar"
 BROADCAST_CMD = ("am broadcast -a com.logitech.intent.action.GENERATE_BUG_REPORT "
                  "-n com.logitech.crashanalytics/com.memfault.bort.receivers.ControlReceiver")
 
+MAR_WAIT_SEC = 15 * 60     # on-device budget for the new .mar to appear
+MAR_POLL_SEC = 10          # per-wait slice: inotifywait timeout, or sleep when it is unavailable
+STATUS_POLL_SEC = 10       # host-side interval between status-file reads
+
 STATUS_FILE = "/data/local/tmp/crashanalytics_chain.status"
 LOG_FILE = "/data/local/tmp/crashanalytics_chain.log"
 
@@ -76,8 +81,7 @@ def ensure_online():
 def ensure_adbd_root():
     """Ensure adbd is running as root (best-effort)."""
     try:
-        root_cmd = (f'adb -s {DEVICE} root')
-        subprocess.run(root_cmd, shell=True, check=True)
+        adb(["root"], timeout=30)
     except Exception as e:
         print(f"[WARN] Could not restart adbd as root: {e}", file=sys.stderr)
 
@@ -86,6 +90,8 @@ def adb_connect_loop(total_seconds=240):
     """Reconnect to the TCP/IP device and wait-for-device within total_seconds."""
     deadline = time.time() + total_seconds
     while time.time() < deadline:
+        if ensure_online():
+            return True  # session still up; no need to reconnect
         try:
             run(["adb", "connect", DEVICE], check=False, timeout=10)
             adb(["wait-for-device"], check=False, timeout=30)
@@ -136,7 +142,8 @@ def launch_background_chain(iface, broadcast_cmd=BROADCAST_CMD):
     Start ONE background job on the DUT that does the following:
       1) iface DOWN
       2) broadcast CrashAnalytics intent
-      3) poll cache every 3 min (5 tries = 15 min) for android-bugreport*.mar
+      3) wait up to MAR_WAIT_SEC for android-bugreport*.mar; each slice returns as soon as a
+         file is created (inotifywait) or after MAR_POLL_SEC when inotifywait is missing
       4) IF found -> iface UP; IF timeout -> iface UP
       5) write status to /data/local/tmp/ca_chain.status and logs to /data/local/tmp/crashanalytics_chain.log
     """
@@ -223,8 +230,15 @@ def launch_background_chain(iface, broadcast_cmd=BROADCAST_CMD):
 
     NEW=
     i=1
-    while [ $i -le 5 ]; do
-      sleep 180
+    END=$(( $(date +%s) + {MAR_WAIT_SEC} ))
+    while [ "$(date +%s)" -lt "$END" ]; do
+      if command -v inotifywait >/dev/null 2>&1; then
+        # returns on the first create/rename in either cache dir, or after the slice timeout
+        inotifywait -q -t {MAR_POLL_SEC} -e create -e moved_to "$CACHE1" "$CACHE2" >/dev/null 2>&1
+        [ $? -eq 1 ] && sleep {MAR_POLL_SEC}
+      else
+        sleep {MAR_POLL_SEC}
+      fi
       C=$(baseline)
       echo "poll $i -> ${{C:-none}}" >>"$LOG"
       if [ -n "$C" ] && [ "$C" != "$BASE" ]; then
@@ -319,7 +333,7 @@ def bugreport_without_internet(iface) :
       4) Start the on-device chain:
            - bring IFACE DOWN
            - fire the on-demand broadcast
-           - poll CrashAnalytics cache every 3 minutes (max 15 minutes)
+           - wait for a new .mar in the CrashAnalytics cache (max 15 minutes)
            - IF FOUND: write status+path and bring IFACE UP immediately
            - IF TIMEOUT: write status=timeout and still bring IFACE UP
       5) From the host, monitor the status file and log until the chain finished
@@ -345,11 +359,12 @@ def bugreport_without_internet(iface) :
     print(f"\n[2] Launch chain on DUT (iface={iface})")
     launch_background_chain(iface)
     print("\n[3] Monitoring for .mar file in local (device may drop ADB briefly)...")
-    deadline = time.time() + (15 * 60) + 5 * 60  # extra 5 min for buffer after wait_time
+    deadline = time.time() + MAR_WAIT_SEC + 5 * 60  # extra 5 min for buffer after wait_time
     while time.time() < deadline:
         adb_connect_loop(15)
         st = read_status().strip()
-        if st:
+        # trigger_* lines are written right after the broadcast; only a status= line means the chain is done
+        if "status=" in st:
             print("\n--- STATUS ---")
             print(st)
             print("\n--- LIST OF FOUND .mar FILES ---")
@@ -357,7 +372,7 @@ def bugreport_without_internet(iface) :
             print("\n--- LAST LOG ---")
             print(read_log_tail(80))
             break
-        time.sleep(30)
+        time.sleep(STATUS_POLL_SEC)
     else:
         print("\n[WARN] No status yet. Recent log:")
         print(read_log_tail(120))
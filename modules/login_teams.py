@@ -1,28 +1,25 @@
-import subprocess
 import re
-import subprocess
-import json
 import logging
 import time
 from pathlib import Path
 import xml.etree.ElementTree as ET
+from utils import adb, dump_ui_xml, json_loads
 
 BASE_DIR = Path(__file__).resolve().parent
 ROOT = BASE_DIR.parent
 teams_credentials_path = ROOT / "teams_login_credentials.json"
+BOUNDS_RE = re.compile(r"\[(\d+),(\d+)\]\[(\d+),(\d+)\]")  # uiautomator "[x1,y1][x2,y2]"
 
 def click_element(resource_id, device):
     """
     Finds and clicks an element on the device screen using its resource-id.
     """
     try:
-        # Step 1: Dump the UI hierarchy using the correct device ID
-        subprocess.run(["adb", "-s", device, "shell", "uiautomator", "dump"], check=True)
-        subprocess.run(["adb", "-s", device, "pull", "/sdcard/window_dump.xml"], check=True)
+        # Step 1: Dump the UI hierarchy using the correct device ID (streamed, no pull)
+        xml_bytes = dump_ui_xml(device)
 
         # Step 2: Parse the UI dump
-        tree = ET.parse("window_dump.xml")
-        root = tree.getroot()
+        root = ET.fromstring(xml_bytes)
 
         # Step 3: Locate the element with the specified resource-id
         for node in root.iter("node"):
@@ -30,13 +27,13 @@ def click_element(resource_id, device):
                 bounds = node.attrib.get("bounds")
                 if bounds:
                     # Calculate the center of the element
-                    match = re.match(r"\[(\d+),(\d+)\]\[(\d+),(\d+)\]", bounds)
+                    match = BOUNDS_RE.match(bounds)
                     if match:
                         x = (int(match.group(1)) + int(match.group(3))) // 2
                         y = (int(match.group(2)) + int(match.group(4))) // 2
 
                         # Tap the calculated coordinates using the correct device ID
-                        subprocess.run(["adb", "-s", device, "shell", "input", "tap", str(x), str(y)], check=True)
+                        adb(device, ["shell", "input", "tap", str(x), str(y)])
                         logging.info("Tapped on element with resource-id '%s' "
                                      "at (%d, %d)", resource_id, x, y)
                         return
@@ -52,7 +49,7 @@ def input_text(text, device):
     """
     try:
         # Use adb to input text using the correct device ID
-        subprocess.run(["adb", "-s", device, "shell", "input", "text", text], check=True)
+        adb(device, ["shell", "input", "text", text])
         logging.info("Input text '%s' on device '%s'", text, device)
     except Exception as e:
         logging.error("Error in inputting text '%s': %s", text, e)
@@ -103,10 +100,9 @@ def login_to_teams_atari(device, email, password):
 
 def read_json(path):
     """ This function loads a JSON file from the specified path and parses it into a Python object
-    (e.g., a dictionary or list) using the `json` module."""
-    with open(path, mode='r') as file:
-        data = json.load(file)
-        return data[0] if isinstance(data, list) else data
+    (e.g., a dictionary or list) using `utils.json_loads` (orjson when installed)."""
+    data = json_loads(Path(path).read_bytes())
+    return data[0] if isinstance(data, list) else data
 
 
 if __name__ == "__main__":
@@ -120,9 +116,8 @@ if __name__ == "__main__":
     print(f"Signed in to Teams successfully with {MAIL}.")
 
     print("Joining Teams meeting...")
-    adb_command = (f'adb -s {DEVICE} shell am start -a android.intent.action.VIEW -d '
-                   f'"{meeting_url}"')
-    subprocess.run(adb_command, shell=True, check=True)
+    # the quotes are kept for the device shell, which would otherwise split the URL on '&'
+    adb(DEVICE, ["shell", "am", "start", "-a", "android.intent.action.VIEW", "-d", f'"{meeting_url}"'])
     time.sleep(10)
     print("Joined Teams meeting successfully.")
 
@@ -2,27 +2,17 @@
 Fetches device mode from Logitech Analytics API.
 
 - Builds headers from local config (via utils.build_headers).
-- Calls GET /api/device/{device_id}.
+- Calls GET /api/device/{device_id} (via version.get_device_info).
 - Extracts device mode from top-level or metadata fields.
 """
 
 from __future__ import annotations
 from typing import Optional, Dict, Any
-import requests
-from utils import build_headers, get_serial_number, get_selected_device
+from utils import build_headers
+# one implementation of GET /api/device/{id} (and its keep-alive session) for both modules
+from modules.version import DEVICE_ID, get_device_info
 
-API_BASE = "https://logi-analytics.vc.logitech.com/api"
-DEVICE = get_selected_device()
-DEVICE_ID = get_serial_number(DEVICE)
-REQUEST_TIMEOUT = 30.0
-
-
-def get_device_info(device_id: str, headers: Dict[str, str]) -> Dict[str, Any]:
-    """Call the device endpoint and return parsed JSON."""
-    url = f"{API_BASE}/device/{device_id}"
-    resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
+REQUEST_TIMEOUT = 30.0  # mode lookups have always allowed 30s (version's default is 15s)
 
 
 def get_device_mode_from_info(info: Dict[str, Any]) -> Optional[str]:
@@ -50,7 +40,7 @@ def get_device_mode_from_info(info: Dict[str, Any]) -> Optional[str]:
 def fetch_device_mode(device_id: str = DEVICE_ID) -> Optional[str]:
     """Fetch device mode by calling API and parsing JSON."""
     headers = build_headers()
-    info = get_device_info(device_id, headers)
+    info = get_device_info(device_id, headers, timeout=REQUEST_TIMEOUT)
     return get_device_mode_from_info(info)
 
 
@@ -37,32 +37,32 @@ Steps
 Security & Notes
 ----------------
 - Ensure the JWT/Cookie you pass to the service is scoped properly and kept secure.
-- `get_collab_version_from_adb` executes a shell command using `adb`. Avoid passing
-  untrusted values for the device serial. Consider using the list-argument form
-  of `subprocess` to reduce shell interpretation risk.
+- `get_collab_version_from_adb` reads the cached `adb shell getprop` snapshot from
+  `utils.get_props` and filters it in Python; no shell pipe runs on host or device.
 
 """
 
 from __future__ import annotations
 from typing import Any, Optional, Dict
-import subprocess
 import re
 import requests
-from utils import build_headers, get_serial_number, get_selected_device
+from utils import build_headers, get_props, get_serial_number, get_selected_device
 
 
 DEVICE =get_selected_device()
 API_BASE = "https://logi-analytics.vc.logitech.com/api"
 DEVICE_ID = get_serial_number(DEVICE)
 REQUEST_TIMEOUT = 30.0
+_VERSION_RE = re.compile(r'\d+\.\d+\.\d+')  # a getprop value that is exactly X.Y.Z
+_SESSION = requests.Session()  # keep-alive connection reused across API calls
 
 
 def get_collab_version_from_adb(adb_device):
     """
        Fetch the CollabOS version from a connected Android device using ADB.
-       This function issues:
-           adb -s <serial> shell "getprop | grep collab"
-       and then searches the output for a semantic version pattern like `X.Y.Z`.
+       Reads the device's cached getprop snapshot (`utils.get_props`, one
+       `adb shell getprop` per run) and returns the first collab property whose
+       value is a semantic version like `X.Y.Z`.
        Parameters:
        adb_device : str
            The ADB device serial (as shown by `adb devices`).
@@ -76,15 +76,12 @@ def get_collab_version_from_adb(adb_device):
        FileNotFoundError
            If `adb` is not installed or not found on PATH.
         Notes
-       - This uses `shell=True` with a formatted string; avoid passing untrusted
-         values to `adb_device`. Prefer using list arguments to `subprocess` for
-         stricter safety if you control both ends."""
-
-    cmd = f'adb -s {adb_device} shell "getprop | grep collab"'
-    output = subprocess.check_output(cmd, shell=True, text=True)
-
-    match = re.search(r'\[(\d+\.\d+\.\d+)\]', output)
-    return match.group(1) if match else None
+       - Filtering happens in Python, so no device-side shell pipe or grep is run."""
+    for key, value in get_props(adb_device).items():
+        # same lines `getprop | grep collab` used to select
+        if ("collab" in key or "collab" in value) and _VERSION_RE.fullmatch(value):
+            return value
+    return None
 
 
 def find_collabos_value(obj: Any) -> Optional[str]:
@@ -142,7 +139,7 @@ def get_device_info(device_id: str, headers: Optional[Dict[str, str]] = None, ti
     if headers is None:
         headers = build_headers()
     url = f"{API_BASE.rstrip('/')}/device/{device_id}"
-    resp = requests.get(url, headers=headers, timeout=timeout)
+    resp = _SESSION.get(url, headers=headers, timeout=timeout)
     resp.raise_for_status()
     data = resp.json()
     if not isinstance(data, dict):
@@ -0,0 +1,64 @@
+"""Shared pytest fixtures for the crash analytics test suites."""
+
+import os
+from datetime import timedelta
+import pytest
+import utils as util
+from modules import events as ev
+
+# Jenkins env keys pytest-metadata would otherwise print into every report
+_HIDDEN_METADATA_KEYS = ("JAVA_HOME", "WORKSPACE", "GIT_URL")
+# env vars set by tests_runner.run_one_cycle -> report label
+_DEVICE_METADATA_ENV = {"CA_SERIAL": "Device serial", "CA_BOARD": "Board", "CA_DISPLAY": "Display name"}
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    """
+    Once per session: pin the resolved device for xdist workers, then tidy the report
+    metadata (hide Jenkins env keys, add the DUT details).
+    """
+    # importing modules.events above already resolved (and connected) the device; workers are
+    # spawned after configure and inherit the env, so they reuse it instead of each running adb connect
+    if not hasattr(config, "workerinput") and not os.getenv("ADB_SERIAL"):
+        os.environ["ADB_SERIAL"] = ev.DEVICE
+    if not config.pluginmanager.hasplugin("metadata"):
+        return
+    from pytest_metadata.plugin import metadata_key
+    metadata = config.stash[metadata_key]
+    for key in _HIDDEN_METADATA_KEYS:
+        metadata.pop(key, None)
+    for env_key, label in _DEVICE_METADATA_ENV.items():
+        value = os.getenv(env_key)
+        if value:
+            metadata[label] = value
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _ensure_auth():
+    """Check once per session that AUTH/COOKIE are configured, instead of at module import time."""
+    if not util.have_auth():
+        pytest.skip("Missing auth: set AUTH and/or COOKIE in the Jenkins environment")
+
+
+@pytest.fixture(scope="session")
+def rebooted_window():
+    """
+    Reboot the selected device once per session and share the fixed IST event window.
+    Returns:
+        tuple[dict, str, str]: (headers, from_iso, to_iso) for `ev.scan_window`.
+    """
+    try:
+        headers = util.build_headers()
+    except Exception as e:
+        pytest.fail(f"Auth configuration error: {e}")
+    try:
+        serial = util.get_selected_device()
+    except Exception as e:
+        pytest.skip(f"No online ADB device: {e}")
+    reboot_ist = ev.reboot_and_wait(serial)
+    # Build the fixed IST window used by the app code
+    from_iso = ev.iso_ist(reboot_ist - timedelta(minutes=ev.PRE_REBOOT_MIN))
+    to_iso = ev.iso_ist(reboot_ist + timedelta(minutes=ev.POST_REBOOT_MIN))
+    print(f"Fixed window (IST): {from_iso} to {to_iso}")
+    return headers, from_iso, to_iso
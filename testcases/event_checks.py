@@ -0,0 +1,52 @@
+"""Event checks shared by the MTR and Zoom suites; each suite keeps a thin test_* wrapper
+so the runner can still target one suite file by the focused app."""
+
+from datetime import datetime, timezone
+import pytest
+from modules import events as ev
+from modules.extraction import dump_event_main
+import utils as util
+from modules import generate_download as generate
+
+
+def check_events_bort(rebooted_window):
+    """
+    End-to-end check:
+      1) reuse the session reboot window (conftest.rebooted_window)
+      2) poll the fixed window for Bort_DiskStats while the periodic
+         bug report is polled and downloaded in the background
+      3) extract events from the bug report once both are done
+    Passes when at least one Bort_DiskStats event is found.
+    """
+    headers, from_iso, to_iso = rebooted_window
+    jwt, cookie = util.get_auth_and_cookie()
+    from_time = generate.iso_z(datetime.fromisoformat(from_iso).astimezone(timezone.utc))
+    to_time = generate.iso_z(datetime.fromisoformat(to_iso).astimezone(timezone.utc))
+    # ---- 1) Poll/download the periodic bug report in the background ----
+    with generate.periodic_download_in_background(jwt, cookie, from_time, to_time, poll_every_sec=60) as download:
+        # ---- 2) Poll for Bort_DiskStats while the download is in flight ----
+        match = ev.poll_for_event(headers, from_iso, to_iso, ev.is_bort_diskstats, "Bort_DiskStats")
+        assert match, "Expected Bort_DiskStats not found in the event window"
+        downloaded_path = download.result()
+    assert downloaded_path, "Failed to download periodic bug report"
+    print(f"Downloaded periodic bug report to {downloaded_path}")
+    # ---- 3) Extract events from the downloaded bug report ----
+    try:
+        search_found = dump_event_main()
+        if not search_found:
+            pytest.fail("Event extraction did not find expected events.")
+    except Exception as e:
+        pytest.fail(f"Event extraction failed: {e}")
+        return
+
+
+def check_events_display(rebooted_window):
+    """
+    End-to-end check:
+      1) reuse the session reboot window (conftest.rebooted_window)
+      2) poll the fixed window for ConnectedDisplay
+    Passes when at least one ConnectedDisplay event is found.
+    """
+    headers, from_iso, to_iso = rebooted_window
+    match = ev.poll_for_event(headers, from_iso, to_iso, ev.is_connected_display, "ConnectedDisplay")
+    assert match, "Expected ConnectedDisplay not found in the event window"
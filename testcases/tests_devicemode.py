@@ -12,6 +12,13 @@ from modules import generate_download as generate
 from modules import events as ev
 from modules import extraction
 
+# host OS and Sync App location are fixed for the run; resolve once at import
+_OS_NAME = platform.system()
+_SYNC_APP_PATHS = {
+    "Windows": os.path.expandvars(r"C:\Program Files (x86)\Logitech\LogiSync\frontend\Sync.exe"),
+    "Darwin": "/Applications/LogiSync.app/Contents/MacOS/LogiSync",
+}
+
 
 def test_camera_txt_file():
     """ Test to trigger an on-demand bug report and verify its appearance and extract camera.txt """
@@ -22,12 +29,12 @@ def test_camera_txt_file():
     try:
         download_path = generate.poll_and_download_ondemand(
             jwt, cookie, trigger_time,
-            poll_minutes=10, poll_every_sec=60
+            poll_minutes=generate.BUGREPORT_POLL_MINUTES
         )
     except TimeoutError:
         pytest.fail("✗ ON-DEMAND bugreport did not appear within the poll window.")
     else:
-        assert download_path and isinstance(download_path, str)
+        assert download_path and isinstance(download_path.get("saved_as"), str)
         print(f"✓ Downloaded: {download_path}")
     try:
         extraction.camera_txt_main()
@@ -54,36 +61,31 @@ def test_sync_app_bugreport_generation():
     # ---- 1) Verify DUT connected ----
     try:
         print("Start test...")
-        device_list = subprocess.check_output(["adb", "devices"], text=True)
-        assert "device" in device_list, "No DUT detected via ADB."
-    except subprocess.SubprocessError as err:
+        serial = util.get_selected_device()
+        state = util.adb(serial, ["get-state"], check=False).stdout.strip()
+        assert state == "device", "No DUT detected via ADB."
+    except (subprocess.SubprocessError, RuntimeError) as err:
         pytest.skip(f"ADB not available or no device found: {err}")
 
     # ---- 2) Verify Internet connection ----
     try:
-        subprocess.run(["adb", "root"], capture_output=True, text=True)
-        subprocess.run(["adb", "shell", "whoami"], capture_output=True, text=True)
-        result = subprocess.check_output(["adb", "shell", "ifconfig", "eth0"], text=True)
+        util.adb(serial, ["root"], check=False)
+        util.adb(serial, ["shell", "whoami"], check=False)
+        result = util.adb(serial, ["shell", "ifconfig", "eth0"]).stdout
         print("✅ Internet available:", result)
     except subprocess.SubprocessError:
         pytest.skip("No internet connection on DUT.")
 
     # ---- 3) Locate Sync App executable ----
-    os_name = platform.system()
-    if os_name == "Windows":
-        sync_app_path = os.path.expandvars(
-            r"C:\Program Files (x86)\Logitech\LogiSync\frontend\Sync.exe"
-        )
-    elif os_name == "Darwin":
-        sync_app_path = "/Applications/LogiSync.app/Contents/MacOS/LogiSync"
-    else:
+    sync_app_path = _SYNC_APP_PATHS.get(_OS_NAME)
+    if not sync_app_path:
         pytest.skip("Unsupported OS for Sync App launch")
 
     assert os.path.exists(sync_app_path), f"Sync app not found at {sync_app_path}"
 
     # ---- 4) Launch Sync App ----
     print(f"Launching Sync App from {sync_app_path}")
-    if os_name == "Windows":
+    if _OS_NAME == "Windows":
         os.startfile(sync_app_path)  # Mimics manual launch
     else:
         subprocess.Popen([sync_app_path])
@@ -105,9 +107,7 @@ def test_sync_app_bugreport_generation():
 
     # ---- 5) Verify device detected ----
     try:
-        device_info = subprocess.check_output(
-            ["adb", "shell", "getprop", "ro.product.model"], text=True
-        ).strip()
+        device_info = util.adb(serial, ["shell", "getprop", "ro.product.model"]).stdout.strip()
         print(f"DUT Detected: {device_info}")
         assert len(device_info) > 0, "DUT info not detected"
     except subprocess.SubprocessError as err:
@@ -139,9 +139,9 @@ def test_sync_app_bugreport_generation():
     print(f"Downloaded periodic bug report to {downloaded_path}")
 
     # ---- 9) Close Sync App ----
-    if os_name == "Windows":
+    if _OS_NAME == "Windows":
         subprocess.run(["taskkill", "/IM", "Sync.exe", "/F"], check=False)
-    elif os_name == "Darwin":
+    elif _OS_NAME == "Darwin":
         subprocess.run(["pkill", "-f", "LogiSync"], check=False)
     print("✅ Sync App closed successfully.")
 
@@ -165,36 +165,31 @@ def test_sync_app_bugreport_generation_without_internet():
     # ---- 1) Verify DUT connected ----
     try:
         print("Start test...")
-        device_list = subprocess.check_output(["adb", "devices"], text=True)
-        assert "device" in device_list, "No DUT detected via ADB."
-    except subprocess.SubprocessError as err:
+        serial = util.get_selected_device()
+        state = util.adb(serial, ["get-state"], check=False).stdout.strip()
+        assert state == "device", "No DUT detected via ADB."
+    except (subprocess.SubprocessError, RuntimeError) as err:
         pytest.skip(f"ADB not available or no device found: {err}")
 
     # ---- 2) Verify Internet connection ----
     try:
-        subprocess.run(["adb", "root"], capture_output=True, text=True)
-        subprocess.run(["adb", "shell", "whoami"], capture_output=True, text=True)
-        result = subprocess.check_output(["adb", "shell", "ifconfig", "eth0","down"], text=True)
+        util.adb(serial, ["root"], check=False)
+        util.adb(serial, ["shell", "whoami"], check=False)
+        result = util.adb(serial, ["shell", "ifconfig", "eth0", "down"]).stdout
         print("✅ Internet not available:", result)
     except subprocess.SubprocessError:
         pytest.skip("No internet connection on DUT.")
 
     # ---- 3) Locate Sync App executable ----
-    os_name = platform.system()
-    if os_name == "Windows":
-        sync_app_path = os.path.expandvars(
-            r"C:\Program Files (x86)\Logitech\LogiSync\frontend\Sync.exe"
-        )
-    elif os_name == "Darwin":
-        sync_app_path = "/Applications/LogiSync.app/Contents/MacOS/LogiSync"
-    else:
+    sync_app_path = _SYNC_APP_PATHS.get(_OS_NAME)
+    if not sync_app_path:
         pytest.skip("Unsupported OS for Sync App launch")
 
     assert os.path.exists(sync_app_path), f"Sync app not found at {sync_app_path}"
 
     # ---- 4) Launch Sync App ----
     print(f"Launching Sync App from {sync_app_path}")
-    if os_name == "Windows":
+    if _OS_NAME == "Windows":
         os.startfile(sync_app_path)  # Mimics manual launch
     else:
         subprocess.Popen([sync_app_path])
@@ -216,9 +211,7 @@ def test_sync_app_bugreport_generation_without_internet():
 
     # ---- 5) Verify device detected ----
     try:
-        device_info = subprocess.check_output(
-            ["adb", "shell", "getprop", "ro.product.model"], text=True
-        ).strip()
+        device_info = util.adb(serial, ["shell", "getprop", "ro.product.model"]).stdout.strip()
         print(f"DUT Detected: {device_info}")
         assert len(device_info) > 0, "DUT info not detected"
     except subprocess.SubprocessError as err:
@@ -250,9 +243,9 @@ def test_sync_app_bugreport_generation_without_internet():
     print(f"Downloaded periodic bug report to {downloaded_path}")
 
     # ---- 9) Close Sync App ----
-    if os_name == "Windows":
+    if _OS_NAME == "Windows":
         subprocess.run(["taskkill", "/IM", "Sync.exe", "/F"], check=False)
-    elif os_name == "Darwin":
+    elif _OS_NAME == "Darwin":
         subprocess.run(["pkill", "-f", "LogiSync"], check=False)
     print("✅ Sync App closed successfully.")
 
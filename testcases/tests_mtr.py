@@ -3,123 +3,25 @@
 import pytest
 import time
 import os
-import json
-from datetime import datetime, timedelta, timezone
+import requests
+from datetime import datetime, timezone
 from modules import events as ev
-from modules.extraction import dump_event_main
 from modules.version import get_collabos_version, get_collab_version_from_adb
 from modules.mode import fetch_device_mode
 import utils as util
 from modules import generate_download as generate
 from modules import local_storage
+from testcases import event_checks
 
-util.have_auth()  # Ensure auth is available before running tests
 
-def test_events_bort():
-    """
-    End-to-end check:
-      1) build headers from config
-      2) pick ADB device, reboot & wait
-      3) poll the fixed window for Bort_DiskStats
-    Passes when at least one Bort_DiskStats event is found.
-    """
-    # ---- 1) Headers / auth ----
-    if not util.have_auth():
-        pytest.skip("Missing auth in config/auth.txt or cookie in config/cookie.txt")
-    try:
-        headers = util.build_headers()
-    except Exception as e:
-        pytest.fail(f"Auth configuration error: {e}")
-        return
-    # ---- 2) Reboot device via ADB ----
-    serial = None
-    try:
-        serial = util.get_selected_device()
-    except Exception as e:
-        pytest.skip(f"No online ADB device: {e}")
-    reboot_ist = ev.reboot_and_wait(serial)
-    # Build the fixed IST window used by the app code
-    from_iso = ev.iso_ist(reboot_ist - timedelta(minutes=ev.PRE_REBOOT_MIN))
-    to_iso = ev.iso_ist(reboot_ist + timedelta(minutes=ev.POST_REBOOT_MIN))
-    print(f"Fixed window (IST): {from_iso} to {to_iso}")
-    # ---- 3) Poll for Bort_DiskStats ----
-    deadline = datetime.now(ev.IST) + timedelta(minutes=ev.POLL_TIMEOUT_MIN)
-    found = False
-    last_count = 0
-    while datetime.now(ev.IST) < deadline and not found:
-        page = ev.scan_window(headers, from_iso, to_iso)
-        last_count = len(page)
-        matches = [item for item in page if ev.is_bort_diskstats(item)]
-        if matches:
-            match = matches[0]
-            ts = ev.ts_ms_to_ist(match.get("timestamp")) if "timestamp" in match else "n/a"
-            print(f"Bort_DiskStats found at {ts}")
-            found = True
-            break
-        print(f"…no match yet (scanned {last_count}). Sleeping {ev.POLL_INTERVAL_MIN} min")
-        time.sleep(ev.POLL_INTERVAL_MIN * 60)
-    assert found, f"Expected Bort_DiskStats not found (scanned last page count={last_count})"
-    # ---- 4) Download the periodic bug report ----
-    jwt, cookie = util.get_auth_and_cookie()
-    from_time = generate.iso_z(datetime.fromisoformat(from_iso).astimezone(timezone.utc))
-    to_time = generate.iso_z(datetime.fromisoformat(to_iso).astimezone(timezone.utc))
-    downloaded_path = generate.poll_and_download_periodic(jwt, cookie, from_time, to_time, poll_every_sec=60)
-    assert downloaded_path, "Failed to download periodic bug report"
-    print(f"Downloaded periodic bug report to {downloaded_path}")
-    # ---- 5) Extract events from the downloaded bug report ----
-    try:
-        search_found = dump_event_main()
-        if not search_found:
-            pytest.fail("Event extraction did not find expected events.")
-    except Exception as e:
-        pytest.fail(f"Event extraction failed: {e}")
-        return
+def test_events_bort(rebooted_window):
+    """Bort_DiskStats in the reboot window plus periodic bug report download and extraction."""
+    event_checks.check_events_bort(rebooted_window)
 
 
-def test_events_display():
-    """
-    End-to-end check:
-      1) build headers from config
-      2) pick ADB device, reboot & wait
-      3) poll the fixed window for Bort_DiskStats
-    Passes when at least one Bort_DiskStats event is found.
-    """
-    # ---- 1) Headers / auth ----
-    if not util.have_auth():
-        pytest.skip("Missing auth in config/auth.txt or cookie in config/cookie.txt")
-    try:
-        headers = util.build_headers()
-    except Exception as e:
-        pytest.fail(f"Auth configuration error: {e}")
-        return
-    # ---- 2) Reboot device via ADB ----
-    serial = None
-    try:
-        serial = util.get_selected_device()
-    except Exception as e:
-        pytest.skip(f"No online ADB device: {e}")
-    reboot_ist = ev.reboot_and_wait(serial)
-    # Build the fixed IST window used by the app code
-    from_iso = ev.iso_ist(reboot_ist - timedelta(minutes=ev.PRE_REBOOT_MIN))
-    to_iso = ev.iso_ist(reboot_ist + timedelta(minutes=ev.POST_REBOOT_MIN))
-    print(f"Fixed window (IST): {from_iso} to {to_iso}")
-    # ---- 3) Poll for ConnectedDisplay ----
-    deadline = datetime.now(ev.IST) + timedelta(minutes=ev.POLL_TIMEOUT_MIN)
-    found = False
-    last_count = 0
-    while datetime.now(ev.IST) < deadline and not found:
-        page = ev.scan_window(headers, from_iso, to_iso)
-        last_count = len(page)
-        matches = [item for item in page if ev.is_connected_display(item)]
-        if matches:
-            match = matches[0]
-            ts = ev.ts_ms_to_ist(match.get("timestamp")) if "timestamp" in match else "n/a"
-            print(f"ConnectedDisplay found at {ts}")
-            found = True
-            break
-        print(f"…no match yet (scanned {last_count}). Sleeping {ev.POLL_INTERVAL_MIN} min")
-        time.sleep(ev.POLL_INTERVAL_MIN * 60)
-    assert found, f"Expected ConnectedDisplay not found (scanned last page count={last_count})"
+def test_events_display(rebooted_window):
+    """ConnectedDisplay in the reboot window."""
+    event_checks.check_events_display(rebooted_window)
 
 
 def test_device_mode_is_appliance():
@@ -158,7 +60,7 @@ def test_on_demand_bugreport_appears():
     try:
         download_path = generate.poll_and_download_ondemand(
             jwt, cookie, trigger_time,
-            poll_minutes=10, poll_every_sec=60
+            poll_minutes=generate.BUGREPORT_POLL_MINUTES
         )
         assert download_path and isinstance(download_path,dict),"poll_and_download_ondemand() returned nothing, on-demand not found."
         fname = download_path.get("saved_as")
@@ -169,56 +71,47 @@ def test_on_demand_bugreport_appears():
         print(f"Downloaded: {download_path}")
 
 
-def test_events():
+def test_events(rebooted_window):
     """This function will test the events once after rebooting the device.
-        1.Authenticate and retrieves the target device serial number.
-        2.Reboot the device and wait for the device to come online.
-        3.Calculates a time window around the reboot(pre-and post-reboot).
-        4.Loads events  and its details from a JSON file.
-        5.Polls the event logs within the defined time window to find expected events.
+        1.Reuse the session reboot window (conftest.rebooted_window).
+        2.Loads events  and its details from a JSON file.
+        3.Polls the event logs within the defined time window to find expected events.
         """
-    # --- Authenticate ---
-    if not util.have_auth():
-        pytest.skip("Missing auth/cookie")
-    headers = util.build_headers()
-    device_serial = util.get_selected_device()
-    reboot_time = ev.reboot_and_wait(device_serial)
-    # ---time window ---
-    from_time = ev.iso_ist(reboot_time - timedelta(minutes=ev.PRE_REBOOT_MIN))
-    to_time = ev.iso_ist(reboot_time + timedelta(minutes=ev.POST_REBOOT_MIN))
-    print(f"Fixed window (IST): {from_time} to {to_time}")
+    headers, from_time, to_time = rebooted_window
     # --- Load events from JSON file ---
     events_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "event_file.json")
     try:
-        with open(events_file, "r", encoding="utf-8") as file:
-            json_events = json.load(file)
+        with open(events_file, "rb") as file:
+            json_events = util.json_loads(file.read())
     except Exception as error:
         pytest.skip(f"Cannot read event_file.json: {error}")
     # --- Poll and check events ---
-    pending_events = [dict(event) for event in json_events]
+    # keyed by position: event_file.json may list the same event name with different expected values
+    pending_events = {index: dict(event) for index, event in enumerate(json_events)}
     found_events = []
-    deadline = time.time() + ev.POLL_TIMEOUT_MIN * 60
-    while pending_events and time.time() < deadline:
+    deadline = time.monotonic() + ev.POLL_TIMEOUT_MIN * 60
+    while pending_events and time.monotonic() < deadline:
         logs = ev.scan_window(headers, from_time, to_time)
-        for event_entry in list(pending_events):
+        logs_by_type = {}
+        for log_item in logs:
+            logs_by_type.setdefault(log_item.get("type"), []).append(log_item)
+        for index, event_entry in list(pending_events.items()):
             event_name = event_entry.get("event")
             event_key = event_entry.get("key")
             expected_patterns = ev.normalize_expected_value(event_entry.get("expected_value"))
-            for log_item in logs:
-                if log_item.get("type") != event_name:
-                    continue
+            for log_item in logs_by_type.get(event_name, ()):
                 possible_values= ev.extract_values(log_item, event_key)
                 matched_value=next((val for val in possible_values if ev.is_match(val, expected_patterns)),None)
                 if matched_value:
                     print(f"Matched event '{event_name}' key '{event_key}' with value '{matched_value}'")
                     found_events.append(event_name)
-                    pending_events.remove(event_entry)
+                    pending_events.pop(index, None)
                     break
         if pending_events:
-            time.sleep(ev.POLL_INTERVAL_MIN * 60)
+            time.sleep(max(0.0, min(ev.POLL_INTERVAL_MIN * 60, deadline - time.monotonic())))
     print(f"Found events: {found_events}")
-    print(f"Pending events: {pending_events}")
-    assert not pending_events, f"Events not found: {pending_events}"
+    print(f"Pending events: {list(pending_events.values())}")
+    assert not pending_events, f"Events not found: {list(pending_events.values())}"
 
 
 def test_bugreport_without_internet():
@@ -286,16 +179,15 @@ def test_bugreport_flushed_portal_after_internet():
     if not local_base:
         print("[WARN] STATUS has no 'path='; cannot compare.")
     else:
+        jwt, cookie = util.get_auth_and_cookie()
+        if not (jwt or cookie):
+            pytest.skip("Missing auth/cookie in ./config (auth.txt or cookie.txt)")
         try:
-            jwt, cookie = util.get_auth_and_cookie()
-            if not (jwt or cookie):
-                pytest.skip("Missing auth/cookie in ./config (auth.txt or cookie.txt)")
-            trigger_time = trigger_time
-            poll_minutes = 10
-            poll_every_sec = 60
-            mar_path = generate.poll_and_download_ondemand(jwt, cookie, trigger_time,poll_minutes, poll_every_sec)
+            poll_minutes = generate.BUGREPORT_POLL_MINUTES
+            # metadata only: the comparison needs the portal path, not the archive bytes
+            portal_report = generate.get_portal_metadata(jwt, cookie, trigger_time, poll_minutes)
 
-            portal_path = local_storage.extract_portal_path(mar_path["path"])
+            portal_path = local_storage.extract_portal_path(portal_report["path"])
             portal_base = local_storage.filebase(portal_path)
             print(f"\n[portal] path={portal_path or '(none)'}")
             print(f"[compare] status_base={local_base}  vs  portal_base={portal_base or '(none)'}")
@@ -303,5 +195,5 @@ def test_bugreport_flushed_portal_after_internet():
             assert portal_base == local_base, (
                 f"Portal metadata.path does not match local .mar\n"
                 f" expected={local_base}\n got     ={portal_base}")
-        except:
-            pytest.fail("Failed during comparison of local and portal .mar files.")
\ No newline at end of file
+        except (TimeoutError, requests.HTTPError) as e:
+            pytest.fail(f"Comparison of local and portal .mar files failed: {e}")
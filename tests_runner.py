@@ -3,20 +3,23 @@ APPLY_PROFILE → wait for device online → set timezone → read focus → run
 """
 
 from __future__ import annotations
+import importlib.util
 import json
 import os
 import shlex
 import subprocess
+import sys
 import time
+from functools import cache
 from pathlib import Path
-import pytest
 
 from utils import (
-    get_focused_app,
-    get_serial_number,
-    get_product_details,
+    get_adb_shell,
+    get_device_metadata,
     get_selected_device,
     adb ,
+    json_loads,
+    ADB_TIMEOUT_SEC,
 )
 
 # ───────────────────────── config ─────────────────────────
@@ -36,26 +39,58 @@ TCP_CONNECT_RETRY_SEC = 3
 TCP_CONNECT_TIMEOUT_SEC = 180  # total time to get back online over TCP
 
 
+@cache
 def reports_dir() -> Path:
+    """Absolute report directory, resolved once (pytest runs with cwd=ROOT, so relative paths must be pinned here)."""
     rd = os.getenv("REPORTS_DIR")
     if rd:
-        return Path(rd)
+        return Path(rd).resolve()
     ws = os.getenv("WORKSPACE")
     if ws:
-        return Path(ws) / "reports"
+        return (Path(ws) / "reports").resolve()
     return ROOT / "reports"
 
 
-def pick_target_by_focus(focused: str) -> str:
-    """Pick pytest target based on focused app name."""
+def xdist_args() -> list[str]:
+    """
+    pytest-xdist args when PYTEST_WORKERS is set ("auto" or a worker count).
+    Off by default: every suite drives the same DUT, so only opt in for suites that can share it.
+    --dist=loadfile keeps each test file (and its device fixtures) on a single worker.
+    """
+    workers = os.getenv("PYTEST_WORKERS", "").strip()
+    if not workers:
+        return []
+    if importlib.util.find_spec("xdist") is None:
+        print("[WARN] PYTEST_WORKERS is set but pytest-xdist is not installed; running serially")
+        return []
+    return ["-p", "xdist", "-n", workers, "--dist=loadfile"]
+
+
+# pytest11 entry-point names of the plugins the run needs; with PYTEST_DISABLE_PLUGIN_AUTOLOAD
+# only these are loaded, so pytest skips scanning every installed distribution for plugins
+PYTEST_PLUGINS = ("metadata", "html", "timeout")
+
+
+def plugin_args() -> list[str]:
+    return [arg for name in PYTEST_PLUGINS for arg in ("-p", name)]
+
+
+# (substring of focused app, pytest target); first match wins, so order matters
+_FOCUS_RULES = (
+    ("zoom", "testcases/tests_zoom.py"),
+    ("teams", "testcases/tests_mtr.py"),
+    ("mtr", "testcases/tests_mtr.py"),
+    ("frogger", "testcases/tests_devicemode.py"),
+    ("device_mode", "testcases/tests_devicemode.py"),
+)
+_DEFAULT_TARGET = "testcases"  # unknown focus: run every suite
+
+
+@cache
+def pick_target_by_focus(focused: str | None) -> str:
+    """Pick pytest target based on focused app name (memoized; the focus repeats across cycles)."""
     focused_app = (focused or "").lower()
-    if "zoom" in focused_app:
-        return "testcases/tests_zoom.py"
-    if "teams" in focused_app or "mtr" in focused_app or "microsoft.teams" in focused_app:
-        return "testcases/tests_mtr.py"
-    if "frogger" in focused_app or "device_mode" in focused_app:
-        return "testcases/tests_device_mode.py"
-    return "testcases"
+    return next((target for key, target in _FOCUS_RULES if key in focused_app), _DEFAULT_TARGET)
 
 
 # ───────────────────── providers ─────────────
@@ -69,7 +104,7 @@ def load_providers_local() -> list[str]:
     if not PROVIDERS_JSON_PATH.exists():
         raise FileNotFoundError(f"providers.json not found at {PROVIDERS_JSON_PATH}")
 
-    data = json.loads(PROVIDERS_JSON_PATH.read_text(encoding="utf-8"))
+    data = json_loads(PROVIDERS_JSON_PATH.read_bytes())
     if isinstance(data, dict) and "providers" in data:
         data = data["providers"]
 
@@ -105,27 +140,33 @@ def wait_for_device_simple(selector: str) -> None:
     """
     if not is_tcp(selector):
         # USB path: just block until device is seen again
-        adb(selector, ["wait-for-device"], check=True)
+        adb(selector, ["wait-for-device"], check=True, timeout=TCP_CONNECT_TIMEOUT_SEC)
         return
 
     # TCP path (reboot breaks the session): keep try connecting + get-state
     deadline = time.time() + TCP_CONNECT_TIMEOUT_SEC
     while time.time() < deadline:
-        # try connect
-        print(f"[ADB] adb connect {selector}")
-        proc = subprocess.run(["adb", "connect", selector],
-                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        if proc.stdout:
-            print(proc.stdout.strip())
-
-        # check state
-        st = subprocess.run(["adb", "-s", selector, "get-state"],
-                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        out = (st.stdout or "").strip().lower()
+        # check state first: only reconnect when the session is not already up
+        # every adb call is bounded so a hung adbd can't outlive the loop deadline
+        try:
+            st = adb(selector, ["get-state"], check=False)
+            out = (st.stdout or st.stderr or "").strip().lower()
+        except subprocess.TimeoutExpired:
+            out = "timeout"
         print(f"[ADB] get-state: {out}")
-        if "device" in out:
+        if out == "device":
             return
 
+        # try connect
+        print(f"[ADB] adb connect {selector}")
+        try:
+            proc = subprocess.run(["adb", "connect", selector], stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT, text=True, timeout=ADB_TIMEOUT_SEC)
+            if proc.stdout:
+                print(proc.stdout.strip())
+        except subprocess.TimeoutExpired:
+            print(f"[ADB] adb connect {selector} timed out after {ADB_TIMEOUT_SEC:g}s")
+
         time.sleep(TCP_CONNECT_RETRY_SEC)
 
     raise TimeoutError(f"Timed out waiting for TCP device to be online ({TCP_CONNECT_TIMEOUT_SEC}s)")
@@ -156,45 +197,60 @@ def apply_service_profile(selector: str, service_provider: str) -> None:
 
 def set_dut_timezone(selector: str, tz: str) -> None:
     adb(selector, ["root"])  # ok if it fails
-    adb_shell(selector, "settings put global auto_time_zone 0")
-    adb_shell(selector, f"setprop persist.sys.timezone {shlex.quote(tz)}")
-    adb_shell(selector, "getprop persist.sys.timezone")
+    # one shell session for the three commands (respawned if `adb root` just restarted adbd)
+    shell = get_adb_shell(selector)
+    shell.run("settings put global auto_time_zone 0", check=True)
+    shell.run(f"setprop persist.sys.timezone {shlex.quote(tz)}", check=True)
+    print(f"[ADB] persist.sys.timezone = {shell.run('getprop persist.sys.timezone')}")
 
 
 # ───────────────────── one provider cycle ─────────────────
-def run_one_cycle(selector: str, reports: Path, provider_label: str) -> int:
-    """ Run one test cycle for given provider."""
-    serial = get_serial_number(selector) or selector
-    board, display = get_product_details(selector)
-    focused = get_focused_app(selector)
+def run_one_cycle(selector: str, reports: Path, provider_label: str, device: str) -> int:
+    """ Run one test cycle for given provider; `device` is the get_selected_device() value handed to pytest."""
+    metadata = get_device_metadata(selector)  # one adb round-trip for all four values
+    serial = metadata["serial"] or selector
+    board, display = metadata["board"], metadata["display"]
+    focused = metadata["focus"]
 
     print(f"Selected device: {serial} | {board} / {display}")
     print(f"Focused app: {focused}")
+    # picked up by testcases/conftest.py pytest_configure for the report metadata
+    env = {**os.environ, "CA_SERIAL": serial, "CA_BOARD": board or "", "CA_DISPLAY": display or ""}
+    # already resolved and connected: the session (and every xdist worker) reuses it without adb connect.
+    # The resolved device, not `selector`: main() appends :5555 even to a USB serial.
+    env["ADB_SERIAL"] = device
+    env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "1"  # plugins are listed explicitly via plugin_args()
 
     target = pick_target_by_focus(focused)
     print(f"Running test target: {target} (based on focused app)")
 
     reports.mkdir(parents=True, exist_ok=True)
-    html = (reports/ f"index_{provider_label}.html").resolve()
-    junit_xml = (reports / f"results_{provider_label}.xml").resolve()
+    # reports is already absolute (reports_dir), so no per-file resolve()
+    html = reports / f"index_{provider_label}.html"
+    junit_xml = reports / f"results_{provider_label}.xml"
 
     args = [
+        sys.executable, "-m", "pytest",
         target,
         "-q",
+        *plugin_args(),
         "--disable-warnings",
         "--html", str(html),
-        "--self-contained-html",
+        # inlining CSS/screenshots costs post-run CPU and memory; Jenkins serves assets/ itself
+        *(["--self-contained-html"] if os.getenv("HTML_STANDALONE") else []),
         f"--junit-xml={junit_xml}",
+        # safety net for a hung adb/HTTP call; generous because bugreport polls legitimately run ~20 min
+        "--timeout", os.getenv("PYTEST_TIMEOUT", "3600"),
+        "--timeout-method=thread",
+        *xdist_args(),
     ]
-    return pytest.main(args)
+    # fresh interpreter per cycle: pytest.main() re-entered in one process keeps the previous
+    # cycle's imported test modules and utils caches (selected device, product details)
+    return subprocess.run(args, cwd=ROOT, env=env).returncode
 
 
 # ────────────────────────────── main ─────────────────────
 def main() -> int:
-    # keep env clean for pytest plugins
-    for k in ("JAVA_HOME", "WORKSPACE", "GIT_URL"):
-        os.environ.pop(k, None)
-
     device = get_selected_device()
     selector = device if ":" in device else f"{device}:5555"
 
@@ -225,7 +281,7 @@ def main() -> int:
         except Exception as e:
             print(f"[WARN] Failed to set DUT timezone for {label}: {e}")
 
-        rc = run_one_cycle(selector, reports, label)
+        rc = run_one_cycle(selector, reports, label, device)
         if final_rc == 0 and rc != 0:
             final_rc = rc
 
@@ -1,45 +1,90 @@
 """Utility functions for device management and API interaction."""
 
 from pathlib import Path
+import atexit
+import io
 import subprocess
 import shlex
 import re
 import os
-from typing import Optional
+import threading
+from functools import cache, lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
 import xml.etree.ElementTree as ET
 
+try:
+    # optional: orjson's C parser is several times faster on big portal pages
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # accepts bytes too
+
 
 ROOT = Path(__file__).resolve().parent
 CONFIG_DIR = ROOT / "config"
 METADATA_PATH = ROOT /"metadata.json"
 
-_SELECTED_SERIAL: Optional[str] = None    # cache for selected device serial
+ADB_TIMEOUT_SEC = float(os.getenv("ADB_TIMEOUT", "30"))  # hard cap for any adb call that has no longer bound of its own
+
+# compiled once; used on every device resolution
+_DEVICES_SEP = str.maketrans(",;", "  ")  # DEVICES separators -> whitespace, then str.split()
+_IPV4_RE = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?$")
+_GETPROP_RE = re.compile(r"^\[([^\]]+)\]:\s*\[([^\]]*)\]", re.M)
+_SHELL_END_RE = re.compile(r"__END__(\d+)\s*$")
+_DEVICE_CODE_RE = re.compile(r"[A-Z0-9]{8,}")
+# first package/activity token of a non-null mFocusedApp line
+_FOCUSED_APP_RE = re.compile(r"mFocusedApp=(?![^\n]*null)[^\n]*?(\S+/\S+)")
 
 
 def _run(cmd, check=True):
-    """ Helper to run a command and capture output."""
-    return subprocess.run(cmd, text=True, capture_output=True, check=check)
+    """ Helper to run a command and capture output; raises subprocess.TimeoutExpired after ADB_TIMEOUT_SEC."""
+    return subprocess.run(cmd, text=True, capture_output=True, check=check, timeout=ADB_TIMEOUT_SEC)
+
+
+@cache
+def _start_adb_server() -> None:
+    """Start the adb server once, up front, so its bootstrap isn't paid inside the first timed adb call."""
+    try:
+        _run(["adb", "start-server"], check=False)
+    except subprocess.TimeoutExpired:
+        pass  # the following adb calls will surface a real problem
 
 
 def _pick_serial_from_devices_listing(match: str) -> Optional[str]:
-    out = _run(["adb", "devices", "-l"], check=False).stdout.splitlines()
-    for line in out:
-        if not line.strip() or line.startswith("List of"):
-            continue
-        parts = line.split()
-        if len(parts) >= 2 and parts[1] == "device":
-            serial = parts[0]
-            if match in line or match == serial:
-                return serial
-    return None
+    """
+    Stream `adb devices -l` and return the first online serial matching `match`.
+    Stops adb as soon as it is found, rather than waiting for slow wireless entries;
+    a watchdog kills adb after ADB_TIMEOUT_SEC like _run would.
+    """
+    with subprocess.Popen(["adb", "devices", "-l"], stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL, text=True) as proc:
+        watchdog = threading.Timer(ADB_TIMEOUT_SEC, proc.kill)
+        watchdog.start()
+        try:
+            for line in proc.stdout:
+                if not line.strip() or line.startswith("List of"):
+                    continue
+                parts = line.split()
+                if len(parts) >= 2 and parts[1] == "device":
+                    serial = parts[0]
+                    if match in line or match == serial:
+                        proc.terminate()
+                        return serial
+            return None
+        finally:
+            watchdog.cancel()
 
 
 def get_selected_device() -> str:
     """
     Resolve and cache the selected device serial number or IP:port.
+    Memoized on the ADB_SERIAL/DEVICE/DEVICES/WORKSPACE values, so repeated calls skip the
+    env parsing, file read and adb connect probe, while a changed env resolves afresh.
 
     Priority order:
-      1. Jenkins environment variable 'DEVICE' (preferred), or first entry in 'DEVICES' (comma/space-separated).
+      0. 'ADB_SERIAL', exported by tests_runner once it has resolved and connected the device;
+         used as-is so pytest(-xdist) workers don't each repeat the adb connect dance.
+      1. Jenkins environment variable 'DEVICE' (preferred), or first entry in 'DEVICES' (comma/semicolon/space-separated).
       2. Fallback: Read from 'config/devices.txt' in the Jenkins workspace.
       3. If the value is an IP, normalize to IP:5555 and connect via ADB; otherwise, treat as a USB serial.
     Returns:
@@ -47,53 +92,72 @@ def get_selected_device() -> str:
     Raises:
         RuntimeError: If no device is found via environment or config file.
     """
-    global _SELECTED_SERIAL
-    if _SELECTED_SERIAL:
-        return _SELECTED_SERIAL
+    return _resolve_device(os.getenv("ADB_SERIAL", ""), os.getenv("DEVICE", ""),
+                           os.getenv("DEVICES", ""), os.getenv("WORKSPACE", "."))
+
+
+@lru_cache(maxsize=8)
+def _resolve_device(adb_serial: str, device: str, devices: str, workspace: str) -> str:
+    """get_selected_device for the given raw env values; failures raise and are not cached."""
+    preset = adb_serial.strip()
+    if preset:
+        return preset
     # 1) Jenkins env: DEVICE first, then DEVICES list
     def clean(s: str) -> str:
         return s.strip().strip('"').strip("'")
-    device = clean(os.getenv("DEVICE", ""))
+    device = clean(device)
     if not device:
-        raw = os.getenv("DEVICES", "")
+        raw = devices
         if raw:
-            for tok in re.split(r"[,\s]+", raw):
+            for tok in raw.translate(_DEVICES_SEP).split():
                 tok = clean(tok)
                 if tok:
                     device = tok
                     break
     # 2) Fallback: Jenkins workspace file written by pipeline
     if not device:
-        ws = os.getenv("WORKSPACE", ".")
-        f = Path(ws) / "config" / "devices.txt"
+        f = Path(workspace) / "config" / "devices.txt"
         if f.exists():
-            for line in f.read_text().splitlines():
-                line = clean(line)
-                if line:
-                    dev = line
-                    break
+            # first non-empty line only; the pipeline writes a single device
+            with f.open(encoding="utf-8") as fh:
+                for raw_line in fh:
+                    line = clean(raw_line)
+                    if line:
+                        device = line
+                        break
     if not device:
         raise RuntimeError(
             "DEVICE not provided. Set DEVICE in Jenkins (or put one line in config/devices.txt)."
         )
     # 3) If it's an IP, normalize to :5555 and connect; else treat as serial
-    ip_re = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?$")
-    if ip_re.match(device):
+    if _IPV4_RE.match(device):
         ip = device if ":" in device else f"{device}:5555"
-        _run(["adb", "disconnect", ip], check=False)  # avoid stale sessions
-        _run(["adb", "connect", ip], check=False)
-        serial = _pick_serial_from_devices_listing(ip)
+        _start_adb_server()
+        try:
+            state = _run(["adb", "-s", ip, "get-state"], check=False).stdout.strip()
+        except subprocess.TimeoutExpired as e:
+            raise RuntimeError(f"adb get-state {ip} timed out after {e.timeout:.0f}s") from e
+        if state == "device":
+            serial = ip  # healthy session already up; don't tear it down
+        else:
+            try:
+                _run(["adb", "disconnect", ip], check=False)  # drop offline/unauthorized sessions
+                out = _run(["adb", "connect", ip], check=False).stdout
+            except subprocess.TimeoutExpired as e:
+                raise RuntimeError(f"adb connect {ip} timed out after {e.timeout:.0f}s") from e
+            # "connected to" / "already connected to": a TCP device's serial is ip:port itself,
+            # so only fall back to listing `adb devices -l` when adb did not confirm the connection
+            serial = ip if "connected to" in out else _pick_serial_from_devices_listing(ip)
         if not serial:
             raise RuntimeError(f"Connected to {ip}, but could not resolve serial from `adb devices -l`.")
     else:
         serial = device  # already a USB serial
-
-    _SELECTED_SERIAL = serial
     return serial
 
 
-def adb(serial: str, args=None, check=True, timeout=None):
-    """Wrapper that always scopes to the selected device."""
+def adb(serial: str, args=None, check=True, timeout=ADB_TIMEOUT_SEC):
+    """Wrapper that always scopes to the selected device.
+    Raises subprocess.TimeoutExpired after `timeout` seconds (ADB_TIMEOUT_SEC unless the caller needs longer)."""
     if args is None:
         args = []
     if isinstance(args, str):
@@ -103,32 +167,141 @@ def adb(serial: str, args=None, check=True, timeout=None):
     return subprocess.run(cmd, text=True, capture_output=True, check=check, timeout=timeout)
 
 
+class AdbShell:
+    """
+    One long-lived `adb -s <serial> shell` that runs commands back to back over a single
+    adbd channel, instead of spawning adb (and a device shell) per command.
+    Each command is followed by `echo __END__$?`; output is read up to that sentinel.
+    A session that died (reboot, `adb root`, TCP drop) is respawned once per command;
+    one that hangs for ADB_TIMEOUT_SEC is killed and the command fails with RuntimeError.
+    """
+
+    def __init__(self, serial: str):
+        self.serial = str(serial)
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _spawn(self) -> None:
+        self.close()
+        self._proc = subprocess.Popen(
+            ["adb", "-s", self.serial, "shell"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1,
+        )
+
+    def _exchange(self, cmd: str) -> tuple[int, str] | None:
+        """Send one command; (exit status, output), or None if the session ended first."""
+        try:
+            self._proc.stdin.write(f"{cmd}; echo __END__$?\n")
+            self._proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            return None
+        lines = []
+        timed_out = threading.Event()
+
+        def _kill(proc=self._proc):
+            timed_out.set()
+            proc.kill()
+
+        # a hung adbd never sends the sentinel; the watchdog kills the session to end the read
+        watchdog = threading.Timer(ADB_TIMEOUT_SEC, _kill)
+        watchdog.start()
+        try:
+            for line in self._proc.stdout:
+                end = _SHELL_END_RE.search(line)
+                if end:
+                    lines.append(line[:end.start()])  # output without a trailing newline
+                    return int(end.group(1)), "".join(lines).strip()
+                lines.append(line)
+        finally:
+            watchdog.cancel()
+        if timed_out.is_set():
+            self.close()
+            raise RuntimeError(f"adb shell on {self.serial} timed out after {ADB_TIMEOUT_SEC:g}s running: {cmd}")
+        return None
+
+    def run(self, cmd: str, check: bool = False) -> str:
+        """
+        Run `cmd` in the device shell and return its stripped stdout+stderr.
+        With check=True a non-zero exit status raises subprocess.CalledProcessError, like adb(check=True).
+        """
+        for _ in range(2):
+            if self._proc is None or self._proc.poll() is not None:
+                self._spawn()
+            result = self._exchange(cmd)
+            if result is not None:
+                status, output = result
+                if check and status:
+                    raise subprocess.CalledProcessError(status, cmd, output=output)
+                return output
+            self.close()
+        raise RuntimeError(f"adb shell session to {self.serial} closed while running: {cmd}")
+
+    def close(self) -> None:
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+
+_SHELLS: dict[str, AdbShell] = {}
+
+
+def get_adb_shell(serial: str) -> AdbShell:
+    """Per-serial AdbShell singleton for the run."""
+    serial = str(serial)
+    if serial not in _SHELLS:
+        _SHELLS[serial] = AdbShell(serial)
+    return _SHELLS[serial]
+
+
+@atexit.register
+def _close_adb_shells() -> None:
+    """Kill the persistent shells on interpreter exit so no `adb shell` child outlives the run."""
+    for shell in _SHELLS.values():
+        shell.close()
+
+
+@cache
+def _getprop_all(device_selected: str) -> dict[str, str]:
+    """Every system property from one `adb shell getprop`, memoized per selector;
+    adb failures raise and are therefore not cached."""
+    out = adb(device_selected, ["shell", "getprop"]).stdout
+    return dict(_GETPROP_RE.findall(out))
+
+
+def get_props(device_selected: str) -> dict[str, str]:
+    """All system properties of the device (a copy of the cached getprop snapshot)."""
+    return dict(_getprop_all(str(device_selected)))
+
+
 def get_serial_number(device_selected: str ) -> str | None:
-    """Return the Android ro.serialno of the selected device."""
+    """Return the Android ro.serialno of the selected device (cached per selector for the run)."""
     try:
-        out = adb(device_selected, ["shell", "getprop", "ro.serialno"]).stdout.strip()
-        match = re.search(r'\[ro\.serialno\]: \[(.*?)\]', out)
-        if match:
-            serial_number = match.group(1)
-            print("Serial number:", serial_number)
-            return serial_number
-        return out or None
-    except subprocess.CalledProcessError:
+        serial_number = _getprop_all(device_selected).get("ro.serialno")
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
         return None
+    if serial_number:
+        print("Serial number:", serial_number)
+    return serial_number or None
 
 
-def get_auth_and_cookie():
-    """ Returns (auth, cookie) from jenkins environment."""
-    auth = os.getenv("AUTH", "").strip()
-    cookie = os.getenv("COOKIE", "").strip()
-    if auth or cookie:
-        return auth, cookie
+@lru_cache(maxsize=4)
+def _auth_from_env(auth_raw: str, cookie_raw: str) -> tuple[str, str]:
+    """(auth, cookie) parsed from the raw env values; memoized on those values."""
+    auth = auth_raw.strip()
+    cookie = cookie_raw.strip()
     # else :
     #     auth = _read_text(CONFIG_DIR / "auth.txt")
     #     cookie = _read_text(CONFIG_DIR / "cookie.txt")
     #     return auth, cookie
-    else :
-        return False
+    # always a pair, so callers can unpack even when nothing is configured
+    return auth, cookie
+
+
+def get_auth_and_cookie() -> tuple[str, str]:
+    """ Returns (auth, cookie) from jenkins environment; cached per AUTH/COOKIE value, so a changed env is picked up."""
+    return _auth_from_env(os.getenv("AUTH", ""), os.getenv("COOKIE", ""))
 
 
 def have_auth() -> bool:
@@ -155,77 +328,125 @@ def read_text(p: Path) -> str | None:
         return None
 
 
-def build_headers() -> dict:
+def build_headers() -> Mapping[str, str]:
     """
     Builds HTTP headers for API requests using JWT and Cookie from jenkins environment.
+    Built once per (JWT, Cookie) pair and cached; every caller shares the same read-only mapping
+    (copy with dict(...) to add headers). A missing-auth RuntimeError is not cached.
     Returns:
-    dict
-        Dictionary of headers including Authorization and Cookie.
+    Mapping[str, str]
+        Read-only mapping of headers including Authorization and Cookie.
     Raises:
     RuntimeError
         If neither JWT nor Cookie is configured.
     """
+    return _headers_for(*get_auth_and_cookie())
+
+
+@lru_cache(maxsize=4)
+def _headers_for(jwt: str, cookie: str) -> Mapping[str, str]:
     headers = {"Accept": "application/json"}
-    jwt,cookie = get_auth_and_cookie()
     if jwt:
         headers["Authorization"] = jwt if jwt.lower().startswith("bearer ") else f"Bearer {jwt}"
     if cookie:
         headers["Cookie"] = cookie
     if "Authorization" not in headers and "Cookie" not in headers:
         raise RuntimeError("No auth configured. Put JWT in config/auth.txt and/or Cookie in config/cookie.txt")
-    return headers
+    return MappingProxyType(headers)
 
 
 def get_focused_app(adb_device):
     """Fetches the currently focused app on the device using adb shell dumpsys."""
     try:
-        # Run the command and capture output
-        active_app = f'adb -s {adb_device} shell "dumpsys window | grep mFocusedApp"'
-        result = subprocess.check_output(
-            active_app,
-            stderr=subprocess.STDOUT,
-            shell=True,
-            text=True
-        )
-        # Split lines and find last non-null mFocusedApp line
-        lines = [line.strip() for line in result.strip().split('\n') if 'mFocusedApp=' in line]
-        for line in reversed(lines):
-            if 'null' not in line:
-                # Extract package/activity from the line
-                parts = line.split()
-                for part in parts:
-                    if '/' in part:
-                        return part.strip()  # This is the package/activity
-        return None
-    except subprocess.CalledProcessError as e:
-        print("Error:", e.output)
+        # reuses the device's persistent shell; the pipe runs on the device, not on the host
+        result = get_adb_shell(adb_device).run("dumpsys window | grep mFocusedApp")
+        return _parse_focused_app(result)
+    except RuntimeError as e:
+        print("Error:", e)
         return None
 
 
+def _parse_focused_app(dumpsys_output: str) -> str | None:
+    """package/activity from the last non-null mFocusedApp line of `dumpsys window`."""
+    matches = _FOCUSED_APP_RE.findall(dumpsys_output)  # one regex pass; last match wins
+    return matches[-1] if matches else None
+
+
+_METADATA_SEP = "\x1e"  # ASCII record separator, printed between the batched commands
+
+
+def get_device_metadata(adb_device: str) -> dict:
+    """
+    Serial, board, display name and focused app in a single round-trip over the device's
+    persistent AdbShell, instead of one adb call each via get_serial_number/get_product_details/get_focused_app
+    (and without spawning a new adb client when the session is already open).
+    Returns:
+        dict: {"serial", "board", "display", "focus"}; a value is None when the device didn't report it.
+    """
+    script = "; printf '\\036'; ".join((
+        "getprop ro.serialno",
+        "getprop ro.product.board",
+        "getprop ro.product.displayname",
+        "dumpsys window | grep mFocusedApp",
+    ))
+    try:
+        out = get_adb_shell(adb_device).run(script)
+    except RuntimeError:
+        out = ""  # session dead or hung past ADB_TIMEOUT_SEC; every field is then None
+    serial, board, display, focus = (out.split(_METADATA_SEP) + ["", "", "", ""])[:4]
+    return {
+        "serial": serial.strip() or None,
+        "board": board.strip() or None,
+        "display": display.strip() or None,
+        "focus": _parse_focused_app(focus),
+    }
+
+
 def get_product_details(adb_device):
-    """Fetches product details using adb shell getprop."""
-    command = f'adb -s {adb_device} shell "getprop | grep ro.product"'
-    output = subprocess.check_output(command, shell=True, text=True)
-
-    # Use regex to find the serial number
-    match_board = re.search(r'\[ro\.product\.board]: \[(.*?)\]', output)
-    match_display_name = re.search(r'\[ro\.product\.displayname]: \[(.*?)\]', output)
-    if match_board and match_display_name:
-        board = match_board.group(1)
-        display_name = match_display_name.group(1)
+    """Fetches product details from the shared getprop snapshot (one adb call per device for the run)."""
+    try:
+        props = _getprop_all(str(adb_device))
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        print("Error:", e)
+        return None
+    board = props.get("ro.product.board")
+    display_name = props.get("ro.product.displayname")
+    if board and display_name:
         print(f"Name Details: {display_name}")
         print(f"Board Details: {board}")
         return board, display_name
 
 
 log_file_path = "window_dump.xml"
-def run_adb_commands():
+
+
+def dump_ui_xml(serial: str | None = None) -> bytes:
+    """
+    UI hierarchy XML streamed straight to the host with `adb exec-out uiautomator dump /dev/tty`:
+    one adb call, no file written on the device or the host.
+    Falls back to dump + pull (into log_file_path) where uiautomator can't write to /dev/tty.
+    """
+    base = ["adb"] + (["-s", str(serial)] if serial else [])
+    out = subprocess.run(base + ["exec-out", "uiautomator", "dump", "/dev/tty"],
+                         capture_output=True, check=True, timeout=ADB_TIMEOUT_SEC).stdout
+    end = out.rfind(b"</hierarchy>")
+    if end != -1:
+        # drop the trailing "UI hierarchy dumped to: /dev/tty" notice
+        return out[out.find(b"<"):end + len(b"</hierarchy>")]
+    subprocess.run(base + ["shell", "uiautomator", "dump"], capture_output=True, check=True, timeout=ADB_TIMEOUT_SEC)
+    subprocess.run(base + ["pull", "/sdcard/window_dump.xml", log_file_path],
+                   capture_output=True, check=True, timeout=ADB_TIMEOUT_SEC)
+    return Path(log_file_path).read_bytes()
+
+
+def run_adb_commands() -> bytes | None:
     try:
-        subprocess.run(["adb", "shell", "uiautomator", "dump"], check=True)
-        subprocess.run(["adb", "pull", "/sdcard/window_dump.xml"], check=True)
-        print("[INFO] UI dump pulled successfully.")
+        xml_bytes = dump_ui_xml()
+        print("[INFO] UI dump captured successfully.")
+        return xml_bytes
     except Exception as e:
         print(f"[ERROR] ADB command failed: {e}")
+        return None
 
 def read_cmd_output_safe():
     try:
@@ -235,21 +456,24 @@ def read_cmd_output_safe():
         print(f"[ERROR] Reading log failed: {e}")
         return ""
 
-def extract_device_code_from_xml():
+def extract_device_code_from_xml(xml_bytes: bytes | None = None):
+    """Login code from a UI dump (bytes from dump_ui_xml, or log_file_path when not given)."""
     try:
-        tree = ET.parse(log_file_path)
-        root = tree.getroot()
-        for node in root.iter("node"):
-            text = node.attrib.get("text", "")
-            if re.fullmatch(r"[A-Z0-9]{8,}", text):
-                return text
+        source = io.BytesIO(xml_bytes) if xml_bytes is not None else log_file_path
+        # stream the dump: stop at the first matching node instead of building the whole tree
+        # (attributes are complete at "start", so nodes are checked in document order as before)
+        for event, node in ET.iterparse(source, events=("start", "end")):
+            if event == "end":
+                node.clear()  # drop the scanned subtree to keep memory flat
+            elif node.tag == "node" and _DEVICE_CODE_RE.fullmatch(node.attrib.get("text", "")):
+                return node.attrib["text"]
     except Exception as e:
         print(f"[ERROR] Could not extract device code: {e}")
     return None
 
 def main():
-    run_adb_commands()
-    code = extract_device_code_from_xml()
+    xml_bytes = run_adb_commands()
+    code = extract_device_code_from_xml(xml_bytes) if xml_bytes else None
     if code:
         print(f"✅ Device login code found: {code}")
     else: